@@ -3,26 +3,88 @@ Data Processing Module for Fraud Detection
 Extracted from the Jupyter notebook for use in Streamlit app
 """
 
+import os
+import hashlib
+import tempfile
+import joblib
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+import sklearn
+from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import IsolationForest
 import warnings
 warnings.filterwarnings('ignore')
 
+MODEL_CACHE_DIR = '.cache'
+# Bump when the engineered features or model inputs change so stale fits are not reused
+MODEL_CACHE_VERSION = 1
+
+# Labels for the integer time_of_day codes produced in preprocess_data (code i -> TIME_OF_DAY_LABELS[i])
+TIME_OF_DAY_LABELS = ['Night', 'Morning', 'Afternoon', 'Evening']
+
+def ensure_datetime(df_model):
+    """Return df_model with a datetime64 'date' column, converting string dates only once at load time"""
+    if pd.api.types.is_datetime64_any_dtype(df_model['date']):
+        return df_model
+    return df_model.assign(date=pd.to_datetime(df_model['date'], format='%Y-%m-%d', cache=True))
+
+def _write_atomically(path, write):
+    """Call write(tmp_path) on a temp file beside path, then rename it over path so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 class FraudDetectionProcessor:
     """Main class for processing fraud detection data"""
     
     def __init__(self):
         self.scaler = StandardScaler()
-        self.encoder = OneHotEncoder(sparse_output=False, drop='first')
         self.model = None
         self.is_fitted = False
         
     def load_data(self, file_path='kenya_fraud_detection.csv'):
         """Load and initial data exploration"""
         try:
-            df = pd.read_csv(file_path)
+            # Reuse a parquet copy of the CSV when it was written from the current CSV version
+            parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+            source_version = None
+            if os.path.exists(file_path):
+                stat = os.stat(file_path)
+                source_version = f"{stat.st_mtime_ns}|{stat.st_size}"
+            
+            df = None
+            if os.path.exists(parquet_path):
+                try:
+                    cached = pd.read_parquet(parquet_path, dtype_backend='pyarrow')
+                    if source_version is None or cached.attrs.pop('source_version', None) == source_version:
+                        df = cached
+                except Exception:
+                    pass  # Unreadable or partially written copy: fall back to the CSV
+            
+            if df is None:
+                df = pd.read_csv(file_path, parse_dates=['datetime'],
+                                 engine='pyarrow', dtype_backend='pyarrow')
+                
+                df.attrs['source_version'] = source_version
+                try:
+                    _write_atomically(parquet_path, lambda tmp_path: df.to_parquet(tmp_path, index=False))
+                except OSError:
+                    pass  # Read-only deployments simply skip the cache
+                df.attrs.pop('source_version')
+            
+            # Parquet round-trips 'datetime' as an Arrow timestamp; keep both paths on datetime64[ns]
+            df['datetime'] = df['datetime'].astype('datetime64[ns]')
+            
+            # Low-cardinality columns that charts count and group on become categoricals
+            for col in ['transaction_type', 'network_provider']:
+                if col in df.columns:
+                    df[col] = df[col].astype('category')
+            
             return df
         except FileNotFoundError:
             st.error(f"Data file {file_path} not found!")
@@ -34,67 +96,72 @@ class FraudDetectionProcessor:
         df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
         
         # Drop unnecessary columns
-        columns_to_drop = ['time_of_day(morning,_afternoon,_evening,_night)', 'unnamed:_0']
+        columns_to_drop = ['time_of_day(morning,_afternoon,_evening,_night)', 'unnamed:_0', '']
         for col in columns_to_drop:
             if col in df.columns:
                 df = df.drop([col], axis=1)
         
-        # Convert datetime
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        
         # Extract temporal features
         df['year'] = df['datetime'].dt.year
         df['month'] = df['datetime'].dt.month
         df['day'] = df['datetime'].dt.day
         df['hour'] = df['datetime'].dt.hour
-        df['day_of_week'] = df['datetime'].dt.day_name()
+        df['day_of_week'] = df['datetime'].dt.dayofweek.astype('int8')  # Monday=0 ... Sunday=6
         
-        # Create time of day feature
-        def map_time_of_day(hour):
-            if 5 <= hour < 12:
-                return "Morning"
-            elif 12 <= hour < 17:
-                return "Afternoon"
-            elif 17 <= hour < 21:
-                return "Evening"
-            else:
-                return "Night"
+        # Create time of day feature as uint8 codes indexing TIME_OF_DAY_LABELS
+        # (bucket 4, hours 21-23, wraps around to Night)
+        hour = df['hour'].to_numpy()
+        df['time_of_day'] = (np.searchsorted([5, 12, 17, 21], hour, side='right') % 4).astype(np.uint8)
         
-        df["time_of_day"] = df["hour"].apply(map_time_of_day)
+        # Store string columns as categoricals so groupby/encoding work on int codes
+        category_cols = ['user_id', 'location', 'transaction_type', 'device_type',
+                         'network_provider', 'user_type', 'day_of_week', 'time_of_day']
+        for col in category_cols:
+            df[col] = df[col].astype('category')
         
         return df
     
     def engineer_features(self, df):
         """Create advanced features for fraud detection"""
-        # Create date column for grouping
-        df['date'] = df['datetime'].dt.date
+        # Create date column for grouping (datetime64 midnight, hashes as int64)
+        df['date'] = df['datetime'].dt.floor('D')
         
         # Transactions per user per day
-        user_txn_count = df.groupby(['user_id', 'date'])['transaction_id'].count().reset_index()
-        user_txn_count.rename(columns={'transaction_id': 'txn_count_per_day'}, inplace=True)
-        df = pd.merge(df, user_txn_count, on=['user_id', 'date'], how='left')
+        df['txn_count_per_day'] = df.groupby(['user_id', 'date'], observed=True)['transaction_id'].transform('count')
+        
+        # Per-user grouping, factorized once and shared by the user-level features
+        user_groups = df.groupby('user_id', observed=True)
         
         # Average transaction amount per user
-        user_avg_txn_amt = df.groupby(['user_id'])['amount'].mean().reset_index()
-        user_avg_txn_amt.rename(columns={'amount': 'avg_txn_amt'}, inplace=True)
-        df = pd.merge(df, user_avg_txn_amt, on=['user_id'], how='left')
+        df['avg_txn_amt'] = user_groups['amount'].transform('mean')
         
         # Amount deviation from user average
-        df['txn_amt_deviation'] = df['amount'] - df['avg_txn_amt']
+        df['txn_amt_deviation'] = df['amount'].to_numpy(copy=False) - df['avg_txn_amt'].to_numpy(copy=False)
         
         # Night transaction flag
-        df['is_night_txn'] = df['time_of_day'].apply(lambda x: 1 if x == 'Night' else 0)
+        df['is_night_txn'] = (df['time_of_day'].to_numpy() == 0).astype(np.int8)
         
         # Risk score for SIM swapping and multiple accounts
-        df['sim_multiple_risk_score'] = df['is_sim_recently_swapped'] + df['has_multiple_accounts']
+        df['sim_multiple_risk_score'] = (df['is_sim_recently_swapped'].to_numpy(copy=False)
+                                         + df['has_multiple_accounts'].to_numpy(copy=False))
         
         # Foreign number high amount
-        df['foreign_high_amt'] = df['is_foreign_number'] * df['amount']
+        df['foreign_high_amt'] = df['is_foreign_number'].to_numpy(copy=False) * df['amount'].to_numpy(copy=False)
         
         # Count unique locations per user
-        user_location_count = df.groupby(['user_id'])['location'].nunique().reset_index()
-        user_location_count.rename(columns={'location': 'unique_location_count'}, inplace=True)
-        df = pd.merge(df, user_location_count, on=['user_id'], how='left')
+        df['unique_location_count'] = user_groups['location'].transform('nunique')
+        
+        # Downcast numeric features to halve memory traffic in later stages
+        count_cols = ['txn_count_per_day', 'unique_location_count', 'month', 'day', 'hour']
+        amount_cols = ['amount', 'avg_txn_amt', 'txn_amt_deviation', 'foreign_high_amt']
+        flag_cols = ['is_foreign_number', 'is_sim_recently_swapped', 'has_multiple_accounts',
+                     'is_night_txn', 'sim_multiple_risk_score']
+        for col in count_cols:
+            df[col] = df[col].astype(np.int32)
+        for col in amount_cols:
+            df[col] = df[col].astype(np.float32)
+        for col in flag_cols:
+            df[col] = df[col].astype(np.int8)
         
         return df
     
@@ -104,21 +171,17 @@ class FraudDetectionProcessor:
         categorical_cols = ['transaction_type', 'location', 'device_type', 
                            'network_provider', 'user_type', 'time_of_day', 'day_of_week']
         
-        # Encode categorical variables
-        encoded_data = self.encoder.fit_transform(df[categorical_cols])
-        encoded_df = pd.DataFrame(encoded_data, 
-                                columns=self.encoder.get_feature_names_out(categorical_cols))
+        # One-hot encode categorical variables as int8 dummies (first level dropped)
+        encoded_df = pd.get_dummies(df[categorical_cols], drop_first=True, dtype=np.int8)
         
         # Merge with original dataframe (drop original categorical columns)
         df_model = pd.concat([df.drop(columns=categorical_cols), encoded_df], axis=1)
         
-        # Numerical columns for scaling
+        # Continuous columns for scaling (0/1 flags and small risk counts are left as-is)
         numerical_cols = [
             'amount', 'month', 'day', 'hour',
-            'is_foreign_number', 'is_sim_recently_swapped', 'has_multiple_accounts',
             'txn_count_per_day', 'avg_txn_amt', 'txn_amt_deviation',
-            'is_night_txn', 'sim_multiple_risk_score', 'foreign_high_amt',
-            'unique_location_count'
+            'foreign_high_amt', 'unique_location_count'
         ]
         
         # Scale numerical features
@@ -126,25 +189,49 @@ class FraudDetectionProcessor:
         
         return df_model
     
-    def train_model(self, df_model, contamination=0.02, n_estimators=200):
-        """Train the Isolation Forest model"""
+    def train_model(self, df_model, contamination=0.02, n_estimators=200, cache_key=None):
+        """Train the Isolation Forest model, reusing a persisted fit for the same cache_key"""
         # Select features for modeling (exclude IDs and datetime columns)
         features_model = [col for col in df_model.columns 
                          if col not in ['transaction_id', 'user_id', 'datetime', 'date']]
         
-        X = df_model[features_model]
+        # Contiguous float32 matrix matches the tree dtype sklearn uses internally
+        X = np.ascontiguousarray(df_model[features_model].to_numpy(dtype=np.float32))
+        
+        # Load a previously fitted model when the data and parameters match
+        cache_path = None
+        if cache_key is not None:
+            cache_path = os.path.join(MODEL_CACHE_DIR, f"isoforest_{cache_key}.joblib")
+            if os.path.exists(cache_path):
+                try:
+                    model, cached_features = joblib.load(cache_path)
+                except Exception:
+                    model, cached_features = None, None  # Unreadable cache file: refit and overwrite it
+                if model is not None and cached_features == features_model:
+                    self.model = model
+                    self.is_fitted = True
+                    return X, features_model
         
         # Initialize and train model
         self.model = IsolationForest(
             n_estimators=n_estimators,
-            max_samples='auto',
+            max_samples=256,
             contamination=contamination,
-            random_state=42
+            random_state=42,
+            n_jobs=-1
         )
         
         self.model.fit(X)
         self.is_fitted = True
         
+        if cache_path is not None:
+            try:
+                os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+                _write_atomically(cache_path,
+                                  lambda tmp_path: joblib.dump((self.model, features_model), tmp_path, compress=3))
+            except OSError:
+                pass  # Read-only deployments simply refit next time
+        
         return X, features_model
     
     def predict_fraud(self, df_model, X, features_model):
@@ -159,22 +246,15 @@ class FraudDetectionProcessor:
         
         return df_model
     
-    def get_fraud_summary(self, df_model):
-        """Get summary statistics of fraud detection"""
-        fraud_count = df_model['is_fraud_predicted'].sum()
-        total_count = len(df_model)
-        fraud_rate = fraud_count / total_count * 100
-        
-        return {
-            'total_transactions': total_count,
-            'fraud_count': fraud_count,
-            'fraud_rate': fraud_rate,
-            'normal_count': total_count - fraud_count
-        }
-    
     def get_suspicious_transactions(self, df_model, df_original, top_n=10):
         """Get top suspicious transactions"""
-        suspicious = df_model[df_model['is_fraud_predicted'] == 1].sort_values('anomaly_score').head(top_n)
+        # Partial top-N selection over flagged rows (lowest scores are most anomalous)
+        flagged_idx = np.flatnonzero(df_model['is_fraud_predicted'].to_numpy())
+        scores = df_model['anomaly_score'].to_numpy()[flagged_idx]
+        k = min(top_n, scores.size)
+        top = np.argpartition(scores, k - 1)[:k] if k > 0 else np.array([], dtype=np.intp)
+        top = top[np.argsort(scores[top])]
+        suspicious = df_model.iloc[flagged_idx[top]]
         
         if suspicious.empty:
             return pd.DataFrame()
@@ -199,40 +279,44 @@ class FraudDetectionProcessor:
     
     def get_fraud_patterns(self, df_model, df_original):
         """Get fraud patterns by various categories"""
-        # Merge with original data for categorical analysis
-        df_analysis = df_original.copy()
-        df_analysis['is_fraud_predicted'] = df_model['is_fraud_predicted'].values
+        df_analysis = self._with_predictions(df_model, df_original)
+        pattern_cols = [col for col in ['location', 'time_of_day', 'device_type',
+                                        'transaction_type', 'network_provider']
+                        if col in df_analysis.columns]
         
         patterns = {}
+        if not pattern_cols:
+            return patterns
         
-        # Check if columns exist before grouping
-        if 'location' in df_analysis.columns:
-            patterns['location'] = df_analysis.groupby('location')['is_fraud_predicted'].mean().sort_values(ascending=False)
-        
-        if 'time_of_day' in df_analysis.columns:
-            patterns['time_of_day'] = df_analysis.groupby('time_of_day')['is_fraud_predicted'].mean()
+        # Stack the categories into one long frame so a single groupby covers every column
+        df_long = df_analysis.melt(id_vars='is_fraud_predicted', value_vars=pattern_cols,
+                                   var_name='cat_col', value_name='cat_val')
+        patterns_long = df_long.groupby(['cat_col', 'cat_val'], observed=True)['is_fraud_predicted'].mean()
         
-        if 'device_type' in df_analysis.columns:
-            patterns['device_type'] = df_analysis.groupby('device_type')['is_fraud_predicted'].mean()
+        for col in pattern_cols:
+            patterns[col] = patterns_long.xs(col, level='cat_col').rename_axis(col)
         
-        if 'transaction_type' in df_analysis.columns:
-            patterns['transaction_type'] = df_analysis.groupby('transaction_type')['is_fraud_predicted'].mean()
-        
-        if 'network_provider' in df_analysis.columns:
-            patterns['network_provider'] = df_analysis.groupby('network_provider')['is_fraud_predicted'].mean()
+        if 'location' in patterns:
+            patterns['location'] = patterns['location'].sort_values(ascending=False)
         
         return patterns
     
     def get_high_risk_users(self, df_model, df_original, top_n=10):
         """Get users with highest fraud rates"""
-        df_analysis = df_original.copy()
-        df_analysis['is_fraud_predicted'] = df_model['is_fraud_predicted'].values
+        df_analysis = self._with_predictions(df_model, df_original)
         
-        user_fraud_rate = df_analysis.groupby('user_id')['is_fraud_predicted'].mean().sort_values(ascending=False)
+        user_fraud_rate = df_analysis.groupby('user_id', observed=True)['is_fraud_predicted'].mean().sort_values(ascending=False)
         
         return user_fraud_rate.head(top_n)
     
-    def process_complete_pipeline(self, file_path='kenya_fraud_detection.csv'):
+    def _with_predictions(self, df_model, df_original):
+        """Return df_original carrying the prediction column, without copying when already attached"""
+        if 'is_fraud_predicted' in df_original.columns:
+            return df_original
+        return df_original.assign(is_fraud_predicted=df_model['is_fraud_predicted'].values)
+    
+    def process_complete_pipeline(self, file_path='kenya_fraud_detection.csv',
+                                  contamination=0.02, n_estimators=200):
         """Run the complete data processing pipeline"""
         # Load data
         df = self.load_data(file_path)
@@ -248,10 +332,24 @@ class FraudDetectionProcessor:
         # Encode and scale
         df_model = self.encode_and_scale(df_features)
         
-        # Train model
-        X, features = self.train_model(df_model)
+        # Train model (or reload the persisted fit for this data file and parameters)
+        cache_key = self._model_cache_key(file_path, contamination, n_estimators)
+        X, features = self.train_model(df_model, contamination, n_estimators, cache_key)
         
         # Make predictions
         df_model = self.predict_fraud(df_model, X, features)
         
+        # Attach predictions once so the analysis helpers can group in place
+        df['is_fraud_predicted'] = df_model['is_fraud_predicted'].to_numpy()
+        
         return df, df_clean, df_model, features
+    
+    def _model_cache_key(self, file_path, contamination, n_estimators):
+        """Build a model cache key from the cache and sklearn versions, data file version and model parameters"""
+        if not os.path.exists(file_path):
+            return None
+        
+        stat = os.stat(file_path)
+        raw_key = (f"{MODEL_CACHE_VERSION}|{sklearn.__version__}|{os.path.abspath(file_path)}|"
+                   f"{stat.st_mtime_ns}|{stat.st_size}|{contamination}|{n_estimators}")
+        return hashlib.md5(raw_key.encode()).hexdigest()[:16]
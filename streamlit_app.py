@@ -3,6 +3,8 @@ Fraud Detection System - Streamlit Web Application
 Interactive dashboard for fraud detection analysis
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -13,7 +15,7 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # Import our custom modules
-from data_processing import FraudDetectionProcessor
+from data_processing import FraudDetectionProcessor, ensure_datetime
 from visualizations import *
 
 # Page configuration
@@ -48,6 +50,26 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+DATA_FILE = 'kenya_fraud_detection.csv'
+
+# Each entry pins the loaded frames and a fitted forest, so keep only a few parameter sets
+@st.cache_resource(show_spinner=False, max_entries=4)
+def run_pipeline(file_path, file_mtime, contamination, n_estimators):
+    """Run the processing pipeline once per data file version and model parameters"""
+    processor = FraudDetectionProcessor()
+    results = processor.process_complete_pipeline(file_path, contamination, n_estimators)
+    return processor, results
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_fraud_patterns(_processor, _df_model, _df_original, dataset_key):
+    """Fraud rates by category, memoized per loaded dataset"""
+    return _processor.get_fraud_patterns(_df_model, _df_original)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_high_risk_users(_processor, _df_model, _df_original, dataset_key, top_n):
+    """Highest-risk users, memoized per loaded dataset and requested count"""
+    return _processor.get_high_risk_users(_df_model, _df_original, top_n)
+
 # Initialize session state
 if 'processor' not in st.session_state:
     st.session_state.processor = FraudDetectionProcessor()
@@ -105,13 +127,20 @@ def main():
         if st.button("🔄 Load and Process Data", type="primary"):
             with st.spinner("Loading and processing data..."):
                 try:
-                    df_original, df_clean, df_model, features = st.session_state.processor.process_complete_pipeline()
+                    file_mtime = os.path.getmtime(DATA_FILE)
+                    processor, results = run_pipeline(
+                        DATA_FILE, file_mtime, contamination, n_estimators
+                    )
+                    df_original, df_clean, df_model, features = results
                     
                     if df_original is not None:
+                        st.session_state.processor = processor
                         st.session_state.df_original = df_original
                         st.session_state.df_clean = df_clean
-                        st.session_state.df_model = df_model
+                        st.session_state.df_model = ensure_datetime(df_model)
                         st.session_state.features = features
+                        # Cheap cache key for figures built from this dataset
+                        st.session_state.dataset_key = (file_mtime, contamination, n_estimators)
                         st.session_state.data_loaded = True
                         st.session_state.model_trained = True
                         st.success("✅ Data loaded and model trained successfully!")
@@ -164,9 +193,40 @@ def main():
         df_clean = st.session_state.df_clean
         df_model = st.session_state.df_model
         features = st.session_state.features
+        dataset_key = st.session_state.dataset_key
         
         # Get fraud summary
-        fraud_summary = st.session_state.processor.get_fraud_summary(df_model)
+        fraud_summary = compute_fraud_summary(df_model)
+        
+        # Slice the flagged transactions once and share them across tabs
+        fraud_mask = df_model['is_fraud_predicted'].to_numpy().astype(bool)
+        df_fraud = df_original.iloc[fraud_mask]
+        
+        patterns = load_fraud_patterns(st.session_state.processor, df_model, df_original, dataset_key)
+        high_risk_users = load_high_risk_users(
+            st.session_state.processor, df_model, df_original, dataset_key, show_high_risk_users
+        )
+        
+        # Build every figure up front in a thread pool; the numpy/pandas work
+        # inside the builders releases the GIL, so slow charts overlap
+        chart_builders = {
+            'overview': (create_fraud_overview_chart, fraud_summary),
+            'scatter': (create_amount_scatter_plot, df_model, dataset_key),
+            'boxplot': (create_amount_distribution_boxplot, df_model),
+            'score_dist': (create_anomaly_score_distribution, df_model),
+            'count_by_type': (create_fraud_count_by_type_chart, df_fraud),
+            'sim_swapped': (create_sim_swapped_analysis, df_fraud),
+            'timeline': (create_timeline_chart, df_model, dataset_key),
+            'user_risk': (create_user_risk_chart, high_risk_users),
+            'network': (create_fraud_by_network_provider_chart, df_fraud),
+            'heatmap': (create_risk_heatmap, df_model, dataset_key, show_suspicious_count),
+        }
+        for category in patterns:
+            chart_builders[category] = (create_fraud_by_category_chart, patterns, category)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {name: executor.submit(fn, *args) for name, (fn, *args) in chart_builders.items()}
+            figs = {name: future.result() for name, future in futures.items()}
         
         # Overview Section
         st.markdown('<h2 class="section-header">📊 Fraud Detection Overview</h2>', unsafe_allow_html=True)
@@ -176,7 +236,7 @@ def main():
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            overview_fig = create_fraud_overview_chart(fraud_summary)
+            overview_fig = figs['overview']
             st.plotly_chart(overview_fig, use_container_width=True, key="fraud_overview")
         
         with col2:
@@ -204,29 +264,28 @@ def main():
             col1, col2 = st.columns(2)
             
             with col1:
-                scatter_fig = create_amount_scatter_plot(df_model)
+                scatter_fig = figs['scatter']
                 st.plotly_chart(scatter_fig, use_container_width=True, key="amount_scatter")
             
             with col2:
-                box_fig = create_amount_distribution_boxplot(df_model)
+                box_fig = figs['boxplot']
                 st.plotly_chart(box_fig, use_container_width=True, key="amount_boxplot")
             
             # Anomaly score distribution
             st.markdown("### Anomaly Score Distribution")
-            score_dist_fig = create_anomaly_score_distribution(df_model)
+            score_dist_fig = figs['score_dist']
             if score_dist_fig:
                 st.plotly_chart(score_dist_fig, use_container_width=True, key="anomaly_distribution")
                 st.write("Lower anomaly scores indicate higher likelihood of fraud.")
             
             # Fraud patterns by transaction type
             st.markdown("### Transaction Type Analysis")
-            patterns = st.session_state.processor.get_fraud_patterns(df_model, df_original)
             
             col1, col2 = st.columns(2)
             
             with col1:
                 if 'transaction_type' in patterns:
-                    type_fig = create_fraud_by_category_chart(patterns, 'transaction_type')
+                    type_fig = figs['transaction_type']
                     if type_fig:
                         st.plotly_chart(type_fig, use_container_width=True, key="transaction_type_rates")
                     else:
@@ -234,8 +293,7 @@ def main():
             
             with col2:
                 # Show fraud transactions by type
-                df_fraud = df_original[df_model['is_fraud_predicted'] == 1]
-                count_fig = create_fraud_count_by_type_chart(df_fraud)
+                count_fig = figs['count_by_type']
                 if count_fig:
                     st.plotly_chart(count_fig, use_container_width=True, key="transaction_type_counts")
                 else:
@@ -248,7 +306,7 @@ def main():
             
             with col1:
                 if 'location' in patterns:
-                    location_fig = create_fraud_by_category_chart(patterns, 'location')
+                    location_fig = figs['location']
                     if location_fig:
                         st.plotly_chart(location_fig, use_container_width=True, key="location_rates")
                     else:
@@ -256,7 +314,7 @@ def main():
             
             with col2:
                 if 'network_provider' in patterns:
-                    provider_fig = create_fraud_by_category_chart(patterns, 'network_provider')
+                    provider_fig = figs['network_provider']
                     if provider_fig:
                         st.plotly_chart(provider_fig, use_container_width=True, key="network_provider_rates")
                     else:
@@ -264,8 +322,7 @@ def main():
             
             # SIM swapped analysis
             st.markdown("### SIM Swapped Analysis")
-            df_fraud = df_original[df_model['is_fraud_predicted'] == 1]
-            sim_fig = create_sim_swapped_analysis(df_fraud)
+            sim_fig = figs['sim_swapped']
             if sim_fig:
                 st.plotly_chart(sim_fig, use_container_width=True, key="sim_swapped_analysis")
             else:
@@ -277,12 +334,12 @@ def main():
             col1, col2 = st.columns(2)
             
             with col1:
-                timeline_fig = create_timeline_chart(df_model)
+                timeline_fig = figs['timeline']
                 st.plotly_chart(timeline_fig, use_container_width=True, key="timeline_chart")
             
             with col2:
                 if 'time_of_day' in patterns:
-                    time_fig = create_fraud_by_category_chart(patterns, 'time_of_day')
+                    time_fig = figs['time_of_day']
                     if time_fig:
                         st.plotly_chart(time_fig, use_container_width=True, key="time_of_day_analysis")
                     else:
@@ -291,19 +348,16 @@ def main():
         with tab4:
             st.markdown('<h3 class="section-header">User Risk Analysis</h3>', unsafe_allow_html=True)
             
-            # High-risk users
-            high_risk_users = st.session_state.processor.get_high_risk_users(df_model, df_original, show_high_risk_users)
-            
             col1, col2 = st.columns(2)
             
             with col1:
-                user_fig = create_user_risk_chart(high_risk_users)
+                user_fig = figs['user_risk']
                 if user_fig:
                     st.plotly_chart(user_fig, use_container_width=True, key="user_risk_chart")
             
             with col2:
                 if 'device_type' in patterns:
-                    device_fig = create_fraud_by_category_chart(patterns, 'device_type')
+                    device_fig = figs['device_type']
                     if device_fig:
                         st.plotly_chart(device_fig, use_container_width=True, key="device_type_analysis")
                     else:
@@ -311,7 +365,7 @@ def main():
             
             # Risk heatmap
             st.markdown("### Risk Score Heatmap")
-            heatmap_fig = create_risk_heatmap(df_model, show_suspicious_count)
+            heatmap_fig = figs['heatmap']
             if heatmap_fig:
                 st.plotly_chart(heatmap_fig, use_container_width=True, key="risk_heatmap_tab4")
         
@@ -320,8 +374,7 @@ def main():
             
             # Network provider analysis
             st.markdown("### Network Provider Fraud Analysis")
-            df_fraud = df_original[df_model['is_fraud_predicted'] == 1]
-            network_fig = create_fraud_by_network_provider_chart(df_fraud)
+            network_fig = figs['network']
             if network_fig:
                 st.plotly_chart(network_fig, use_container_width=True, key="network_provider_counts")
             else:
@@ -329,7 +382,7 @@ def main():
             
             # Risk heatmap
             st.markdown("### Risk Score Heatmap")
-            heatmap_fig = create_risk_heatmap(df_model, show_suspicious_count)
+            heatmap_fig = figs['heatmap']
             if heatmap_fig:
                 st.plotly_chart(heatmap_fig, use_container_width=True, key="risk_heatmap_tab5")
                 st.write("Heatmap showing risk scores for top suspicious transactions across different features.")
@@ -6,20 +6,77 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
+import streamlit as st
+
+# Figure cache for the slow chart builders. Callers pass dataset_key, a small
+# token identifying the loaded data and model parameters, as the cache key;
+# DataFrame arguments are underscored so Streamlit does not hash their content
+chart_cache = st.cache_data(show_spinner=False, max_entries=64)
+
+# Upper bound on normal-class points drawn in the amount scatter
+SCATTER_MAX_POINTS = 1000
+
+# Fixed categories and colors for the fraud overview chart
+_OVERVIEW_CATS = ('Normal', 'Fraud')
+_OVERVIEW_COLORS = ('#2E8B57', '#DC143C')
+
+def _minmax_downsample(x, y, n_bins):
+    """Return indices keeping the min and max y within each of n_bins equal-width x bins"""
+    if x.size <= 2 * n_bins:
+        return np.arange(x.size)
+    
+    x_range = np.ptp(x) or 1.0
+    bins = np.minimum(((x - x.min()) / x_range * n_bins).astype(np.intp), n_bins - 1)
+    
+    # Order by bin, then y: the first and last row of each bin run are its min and max
+    order = np.lexsort((y, bins))
+    sorted_bins = bins[order]
+    starts = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+    ends = np.r_[starts[1:], sorted_bins.size] - 1
+    return np.unique(np.r_[order[starts], order[ends]])
+
+def _slim(values):
+    """Downcast an array for chart serialization: float64 -> float32, small int64 -> int8"""
+    values = np.asarray(values)
+    if values.dtype == np.float64:
+        return values.astype(np.float32)
+    if values.dtype == np.int64 and values.size and values.min() >= -128 and values.max() <= 127:
+        return values.astype(np.int8)
+    return values
+
+def _category_counts(values):
+    """Count values per category via bincount on integer codes, largest first like value_counts"""
+    cat = pd.Categorical(values)
+    codes = cat.codes[cat.codes >= 0]
+    counts = np.bincount(codes, minlength=len(cat.categories))
+    order = np.argsort(-counts, kind='stable')
+    order = order[counts[order] > 0]
+    return cat.categories[order], counts[order]
+
+def compute_fraud_summary(df_model):
+    """Compute fraud summary counts shared by the overview metrics, chart and insights"""
+    flags = df_model['is_fraud_predicted'].to_numpy(dtype=np.int8)
+    fraud_count = int(flags.sum())
+    total_count = int(flags.size)
+    
+    return {
+        'total_transactions': total_count,
+        'fraud_count': fraud_count,
+        'fraud_rate': 100.0 * fraud_count / total_count if total_count else 0.0,
+        'normal_count': total_count - fraud_count
+    }
 
 def create_fraud_overview_chart(fraud_summary):
     """Create overview metrics chart"""
     fig = go.Figure()
     
     # Add fraud vs normal comparison
-    categories = ['Normal', 'Fraud']
-    values = [fraud_summary['normal_count'], fraud_summary['fraud_count']]
-    colors = ['#2E8B57', '#DC143C']
+    values = (int(fraud_summary['normal_count']), int(fraud_summary['fraud_count']))
     
     fig.add_trace(go.Bar(
-        x=categories,
+        x=_OVERVIEW_CATS,
         y=values,
-        marker_color=colors,
+        marker_color=_OVERVIEW_COLORS,
         text=values,
         textposition='auto',
     ))
@@ -34,31 +91,45 @@ def create_fraud_overview_chart(fraud_summary):
     
     return fig
 
-def create_amount_scatter_plot(df_model):
+@chart_cache
+def create_amount_scatter_plot(_df_model, dataset_key):
     """Create scatter plot of anomalies vs normal transactions"""
-    fig = px.scatter(
-        df_model,
-        x='amount',
-        y='avg_txn_amt',
-        color='is_fraud_predicted',
-        color_discrete_map={0: 'blue', 1: 'red'},
+    amount = _slim(_df_model['amount'].to_numpy())
+    avg_amount = _slim(_df_model['avg_txn_amt'].to_numpy())
+    is_fraud = _df_model['is_fraud_predicted'].to_numpy() == 1
+    
+    # MinMax-downsample the normal class; fraud points are rare and always kept
+    normal_idx = np.flatnonzero(~is_fraud)
+    normal_idx = normal_idx[_minmax_downsample(amount[normal_idx], avg_amount[normal_idx],
+                                               SCATTER_MAX_POINTS // 2)]
+    fraud_idx = np.flatnonzero(is_fraud)
+    
+    # Single WebGL trace with per-point colors precomputed in numpy
+    idx = np.concatenate([normal_idx, fraud_idx])
+    fig = go.Figure(go.Scattergl(
+        x=amount[idx],
+        y=avg_amount[idx],
+        mode='markers',
+        marker=dict(color=np.where(is_fraud[idx], 'red', 'blue'), opacity=0.6)
+    ))
+    
+    fig.update_layout(
         title="Transaction Amount vs User Average (Anomalies in Red)",
-        labels={
-            'amount': 'Transaction Amount (Scaled)',
-            'avg_txn_amt': 'User Average Amount (Scaled)',
-            'is_fraud_predicted': 'Fraud Prediction'
-        },
-        opacity=0.6
+        xaxis_title="Transaction Amount (Scaled)",
+        yaxis_title="User Average Amount (Scaled)",
+        height=500
     )
-    
-    fig.update_layout(height=500)
     return fig
 
-def create_timeline_chart(df_model):
-    """Create timeline of fraud detection"""
-    df_model['date'] = pd.to_datetime(df_model['date'])
-    timeline_data = df_model.groupby('date')['is_fraud_predicted'].apply(lambda x: (x==1).sum()).reset_index()
-    timeline_data.columns = ['date', 'fraud_count']
+@chart_cache
+def create_timeline_chart(_df_model, dataset_key):
+    """Create timeline of fraud detection (expects a datetime64 'date', see data_processing.ensure_datetime)"""
+    # Group a two-column projection so the frame itself is never modified;
+    # is_fraud_predicted is 0/1, so a plain sum counts the flagged rows per date
+    timeline_data = pd.DataFrame({
+        'date': _df_model['date'].to_numpy(),
+        'fraud_count': _df_model['is_fraud_predicted'].to_numpy()
+    }).groupby('date', as_index=False, sort=True)['fraud_count'].sum()
     
     fig = px.line(
         timeline_data,
@@ -77,21 +148,20 @@ def create_timeline_chart(df_model):
 
 def create_amount_distribution_boxplot(df_model):
     """Create boxplot of transaction amounts by fraud status"""
-    # Convert fraud prediction to string for better display
-    df_model['fraud_status'] = df_model['is_fraud_predicted'].map({0: 'Normal', 1: 'Fraud'})
+    # Label fraud status as a numpy array rather than adding a column to df_model
+    fraud_status = np.where(df_model['is_fraud_predicted'].to_numpy() == 1, 'Fraud', 'Normal')
+    
+    fig = go.Figure(go.Box(
+        x=fraud_status,
+        y=df_model['amount'].to_numpy()
+    ))
     
-    fig = px.box(
-        df_model,
-        x='fraud_status',
-        y='amount',
+    fig.update_layout(
         title="Transaction Amount Distribution: Fraud vs Normal",
-        labels={
-            'fraud_status': 'Transaction Status',
-            'amount': 'Transaction Amount (Scaled)'
-        }
+        xaxis_title="Transaction Status",
+        yaxis_title="Transaction Amount (Scaled)",
+        height=400
     )
-    
-    fig.update_layout(height=400)
     return fig
 
 def create_fraud_by_category_chart(patterns, category):
@@ -100,22 +170,18 @@ def create_fraud_by_category_chart(patterns, category):
         return None
     
     try:
-        df_chart = patterns[category].reset_index()
-        df_chart.columns = ['category', 'fraud_rate']
-        df_chart['fraud_rate'] = df_chart['fraud_rate'] * 100  # Convert to percentage
+        fraud_rates = patterns[category]
+        category_label = category.replace('_', ' ').title()
         
-        fig = px.bar(
-            df_chart,
-            x='category',
-            y='fraud_rate',
-            title=f"Fraud Rate by {category.replace('_', ' ').title()}",
-            labels={
-                'category': category.replace('_', ' ').title(),
-                'fraud_rate': 'Fraud Rate (%)'
-            }
-        )
+        fig = go.Figure(go.Bar(
+            x=fraud_rates.index.to_numpy(),
+            y=fraud_rates.to_numpy() * 100  # Convert to percentage
+        ))
         
         fig.update_layout(
+            title=f"Fraud Rate by {category_label}",
+            xaxis_title=category_label,
+            yaxis_title="Fraud Rate (%)",
             height=400,
             xaxis_tickangle=-45
         )
@@ -130,42 +196,44 @@ def create_fraud_count_by_type_chart(df_fraud):
     if df_fraud.empty:
         return None
     
-    fraud_counts = df_fraud['transaction_type'].value_counts()
+    types, counts = _category_counts(df_fraud['transaction_type'])
     
-    fig = px.bar(
-        x=fraud_counts.index,
-        y=fraud_counts.values,
-        title="Fraud Transactions by Type",
-        labels={
-            'x': 'Transaction Type',
-            'y': 'Number of Fraudulent Transactions'
-        }
-    )
+    fig = go.Figure(go.Bar(x=types, y=counts))
     
     fig.update_layout(
+        title="Fraud Transactions by Type",
+        xaxis_title="Transaction Type",
+        yaxis_title="Number of Fraudulent Transactions",
         height=400,
         xaxis_tickangle=-45
     )
     
     return fig
 
-def create_risk_heatmap(df_model, top_n=20):
+@chart_cache
+def create_risk_heatmap(_df_model, dataset_key, top_n=20):
     """Create risk score heatmap for top suspicious transactions"""
-    # Get top suspicious transactions
-    suspicious = df_model[df_model['is_fraud_predicted'] == 1].nlargest(top_n, 'anomaly_score')
-    
-    if suspicious.empty:
+    # Get top suspicious transactions: partial top-k over flagged scores, no filtered copy
+    mask = _df_model['is_fraud_predicted'].to_numpy() == 1
+    k = min(top_n, int(mask.sum()))
+    if k == 0:
         return None
     
+    scores = np.where(mask, _df_model['anomaly_score'].to_numpy(), -np.inf)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    idx = idx[np.argsort(-scores[idx], kind='stable')]
+    suspicious = _df_model.iloc[idx]
+    
     # Create heatmap data
     risk_features = ['amount', 'avg_txn_amt', 'txn_amt_deviation', 
                     'sim_multiple_risk_score', 'foreign_high_amt', 'unique_location_count']
     
-    heatmap_data = suspicious[risk_features].T
-    heatmap_data.columns = [f"TXN {i}" for i in range(1, len(suspicious) + 1)]
+    heatmap_data = suspicious[risk_features].to_numpy(dtype=np.float32).T
     
     fig = px.imshow(
         heatmap_data,
+        x=[f"TXN {i}" for i in range(1, heatmap_data.shape[1] + 1)],
+        y=risk_features,
         aspect="auto",
         title=f"Risk Score Heatmap - Top {top_n} Suspicious Transactions",
         labels={
@@ -183,22 +251,15 @@ def create_user_risk_chart(high_risk_users):
     if high_risk_users.empty:
         return None
     
-    df_chart = high_risk_users.reset_index()
-    df_chart.columns = ['user_id', 'fraud_rate']
-    df_chart['fraud_rate'] = df_chart['fraud_rate'] * 100  # Convert to percentage
-    
-    fig = px.bar(
-        df_chart,
-        x='user_id',
-        y='fraud_rate',
-        title="Top High-Risk Users by Fraud Rate",
-        labels={
-            'user_id': 'User ID',
-            'fraud_rate': 'Fraud Rate (%)'
-        }
-    )
+    fig = go.Figure(go.Bar(
+        x=high_risk_users.index.to_numpy(),
+        y=high_risk_users.to_numpy() * 100  # Convert to percentage
+    ))
     
     fig.update_layout(
+        title="Top High-Risk Users by Fraud Rate",
+        xaxis_title="User ID",
+        yaxis_title="Fraud Rate (%)",
         height=400,
         xaxis_tickangle=-45
     )
@@ -211,24 +272,22 @@ def create_sim_swapped_analysis(df_fraud):
         return None
     
     try:
-        sim_counts = df_fraud['is_sim_recently_swapped'].value_counts().reset_index()
-        sim_counts.columns = ['is_sim_recently_swapped', 'count']
-        sim_counts['is_sim_recently_swapped'] = sim_counts['is_sim_recently_swapped'].map({0: 'No', 1: 'Yes'})
+        # The flag is already 0/1, so bincount gives the No/Yes counts directly
+        sim_labels = ['No', 'Yes']
+        sim_counts = np.bincount(df_fraud['is_sim_recently_swapped'].to_numpy(dtype=np.int8), minlength=2)
+        
+        fig = go.Figure(go.Bar(
+            x=sim_labels,
+            y=sim_counts,
+            marker_color=['lightblue', 'orange']
+        ))
         
-        fig = px.bar(
-            sim_counts,
-            x='is_sim_recently_swapped',
-            y='count',
+        fig.update_layout(
             title="Fraud Transactions by SIM Swapped Status",
-            labels={
-                'is_sim_recently_swapped': 'SIM Recently Swapped',
-                'count': 'Number of Fraudulent Transactions'
-            },
-            color='is_sim_recently_swapped',
-            color_discrete_map={'No': 'lightblue', 'Yes': 'orange'}
+            xaxis_title="SIM Recently Swapped",
+            yaxis_title="Number of Fraudulent Transactions",
+            height=400
         )
-        
-        fig.update_layout(height=400)
         return fig
     except Exception as e:
         print(f"Error creating SIM swapped analysis: {e}")
@@ -240,21 +299,16 @@ def create_fraud_by_network_provider_chart(df_fraud):
         return None
     
     try:
-        provider_counts = df_fraud['network_provider'].value_counts().reset_index()
-        provider_counts.columns = ['network_provider', 'count']
+        providers, counts = _category_counts(df_fraud['network_provider'])
         
-        fig = px.bar(
-            provider_counts,
-            x='network_provider',
-            y='count',
+        fig = go.Figure(go.Bar(x=providers, y=counts))
+        
+        fig.update_layout(
             title="Fraud Transactions by Network Provider",
-            labels={
-                'network_provider': 'Network Provider',
-                'count': 'Number of Fraudulent Transactions'
-            }
+            xaxis_title="Network Provider",
+            yaxis_title="Number of Fraudulent Transactions",
+            height=400
         )
-        
-        fig.update_layout(height=400)
         return fig
     except Exception as e:
         print(f"Error creating network provider chart: {e}")
@@ -263,21 +317,34 @@ def create_fraud_by_network_provider_chart(df_fraud):
 def create_anomaly_score_distribution(df_model):
     """Create distribution of anomaly scores"""
     try:
-        fig = px.histogram(
-            df_model,
-            x='anomaly_score',
-            color='is_fraud_predicted',
-            color_discrete_map={0: 'blue', 1: 'red'},
+        # Bin server-side so only 2 x 50 bar heights are sent to the browser
+        n_bins = 50
+        scores = _slim(df_model['anomaly_score'].to_numpy())
+        flag = df_model['is_fraud_predicted'].to_numpy() == 1
+        edges = np.linspace(scores.min(), scores.max(), n_bins + 1)
+        
+        # Bin both classes in one pass without masked copies: fraud rows are
+        # offset into a second block of bins (last bin closed, as np.histogram)
+        bin_idx = np.clip(np.searchsorted(edges, scores, side='right') - 1, 0, n_bins - 1)
+        counts = np.bincount(bin_idx + n_bins * flag, minlength=2 * n_bins)
+        normal_counts, fraud_counts = counts[:n_bins], counts[n_bins:]
+        centers = 0.5 * (edges[:-1] + edges[1:])
+        normal_counts, fraud_counts = _slim(normal_counts), _slim(fraud_counts)
+        
+        fig = go.Figure([
+            go.Bar(x=centers, y=normal_counts, name='Normal', marker_color='blue'),
+            go.Bar(x=centers, y=fraud_counts, name='Fraud', marker_color='red')
+        ])
+        
+        fig.update_layout(
             title='Distribution of Anomaly Scores',
-            labels={
-                'anomaly_score': 'Anomaly Score',
-                'count': 'Number of Transactions',
-                'is_fraud_predicted': 'Status'
-            },
-            nbins=50
+            xaxis_title='Anomaly Score',
+            yaxis_title='Number of Transactions',
+            legend_title_text='Status',
+            barmode='overlay',
+            bargap=0,
+            height=400
         )
-        
-        fig.update_layout(height=400)
         return fig
     except Exception as e:
         print(f"Error creating anomaly score distribution: {e}")
@@ -285,8 +352,6 @@ def create_anomaly_score_distribution(df_model):
 
 def create_summary_metrics_display(fraud_summary):
     """Create summary metrics display"""
-    import streamlit as st
-    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1: